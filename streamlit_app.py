@@ -1,12 +1,27 @@
 import streamlit as st
-import pandas as pd
 import datetime
+import functools
+import hashlib
+import hmac
+
+from vendor_dashboard.core import (
+    anchor_days,
+    assign_rank_badge,
+    clean_price_col,
+    get_master_frame,
+    product_options,
+    product_rows,
+    recalc_terms_days_vec,
+    score_df,
+    serialize_csv,
+    serialize_parquet,
+)
 
 # -----------------------------------------------------
 # SECURE LOGIN (via Streamlit Secrets)
 # -----------------------------------------------------
 try:
-    APP_PASSWORD = st.secrets["PASSWORD"]
+    APP_PASSWORD = str(st.secrets["PASSWORD"])
 except:
     APP_PASSWORD = None
 
@@ -27,7 +42,8 @@ def login_screen():
 
     pw = st.text_input("Enter password:", type="password")
 
-    if pw == APP_PASSWORD:
+    # Constant-time compare so response time doesn't leak how much matched
+    if pw and hmac.compare_digest(pw.encode(), APP_PASSWORD.encode()):
         st.session_state["auth"] = True
         st.success("Login successful! Redirecting...")
         st.rerun()
@@ -44,61 +60,6 @@ if not st.session_state["auth"]:
     login_screen()
 
 
-# -----------------------------------------------------
-# SAFE CLEANERS
-# -----------------------------------------------------
-def clean_price(x):
-    """Remove spaces, empty values, convert to float safely."""
-    try:
-        x = str(x).strip()
-        if x == "" or x.lower() in ["none", "nan"]:
-            return None
-        return float(x)
-    except:
-        return None
-
-
-def recalc_terms_days(term_raw):
-    if pd.isna(term_raw):
-        return None
-
-    term_raw = str(term_raw).strip()
-    today = datetime.date.today()
-
-    if term_raw == "" or term_raw.lower() == "none":
-        return None
-
-    if "No current vendor" in term_raw:
-        return None
-
-    if "30" in term_raw:
-        return 30
-
-    if "August 1st" in term_raw:
-        due = datetime.date(today.year, 8, 1)
-        if due < today:
-            due = datetime.date(today.year + 1, 8, 1)
-        return (due - today).days
-
-    if "March 15th" in term_raw:
-        due = datetime.date(today.year, 3, 15)
-        if due < today:
-            due = datetime.date(today.year + 1, 3, 15)
-        return (due - today).days
-
-    return None
-
-
-def calculate_vendor_score(row):
-    price = clean_price(row["price"])
-    days = row["terms_days"]
-
-    if price is None or days is None or days == 0:
-        return None
-
-    return round(price + (1 / days), 4)
-
-
 # -----------------------------------------------------
 # MAIN APP
 # -----------------------------------------------------
@@ -107,39 +68,48 @@ st.title("📊 Vendor Pricing, Terms & Score Dashboard")
 uploaded_file = st.file_uploader("Upload master_pricing_clean.csv", type=["csv"])
 
 if uploaded_file:
-    df = pd.read_csv(uploaded_file)
-
-    # CLEAN PRICE FIRST
-    df["price"] = df["price"].apply(clean_price)
-
-    # CLEAN TERMS
-    df["terms_days"] = df["terms_raw"].apply(recalc_terms_days)
-
-    # SCORE
-    df["vendor_score"] = df.apply(calculate_vendor_score, axis=1)
+    aug_days, mar_days = anchor_days(datetime.date.today())
+    raw = uploaded_file.getvalue()
+    file_key = hashlib.blake2b(raw, digest_size=16).hexdigest()
+    df = get_master_frame(file_key, raw, aug_days, mar_days)
 
     st.success("Dataset loaded successfully!")
 
     # -----------------------
     # PRODUCT FILTER
     # -----------------------
-    product_list = sorted(df["product"].unique())
+    product_list = product_options(file_key, df)
     selected_product = st.selectbox("Select Product", product_list)
 
-    product_df = df[df["product"] == selected_product].copy()
+    # iloc already returns a new frame and st.data_editor never mutates its
+    # input, so no extra .copy() is needed
+    # product is categorical only as a filter key; the editor gets it as text
+    # so a product can be renamed to a new value
+    rows = product_rows(file_key, df)
+    product_df = df.iloc[rows[selected_product]].astype({"product": "string"})
 
     st.subheader(f"🧾 Edit Pricing & Terms – {selected_product}")
 
+    # One editor state per product, so edits never carry over to another product
+    editor_key = f"editor_{selected_product}"
     edited_df = st.data_editor(
         product_df,
         width="stretch",
-        hide_index=True
+        hide_index=True,
+        key=editor_key
     )
 
-    # CLEAN AGAIN AFTER EDITS
-    edited_df["price"] = edited_df["price"].apply(clean_price)
-    edited_df["terms_days"] = edited_df["terms_raw"].apply(recalc_terms_days)
-    edited_df["vendor_score"] = edited_df.apply(calculate_vendor_score, axis=1)
+    # CLEAN AGAIN AFTER EDITS (only rows the user touched; the rest are
+    # already clean from load_and_prepare)
+    edited_rows = st.session_state[editor_key]["edited_rows"]
+    if edited_rows:
+        changed = edited_df.index[sorted(int(i) for i in edited_rows)]
+        sub = edited_df.loc[changed]
+        edited_df.loc[changed, "price"] = clean_price_col(sub["price"]).to_numpy()
+        edited_df.loc[changed, "terms_days"] = recalc_terms_days_vec(
+            sub["terms_raw"], aug_days, mar_days
+        ).to_numpy()
+        edited_df.loc[changed, "vendor_score"] = score_df(edited_df.loc[changed]).to_numpy()
 
     # -----------------------
     # CEO ORDER QUANTITY
@@ -147,16 +117,15 @@ if uploaded_file:
     st.subheader("📦 CEO Order Quantity")
     qty = st.number_input("Enter quantity to order:", min_value=1, value=100)
 
-    edited_df["total_cost"] = edited_df["price"] * qty
+    # price is already float64 from clean_price_col; no cast needed
+    edited_df["total_cost"] = edited_df["price"].to_numpy() * qty
 
     # -----------------------
     # RANKING
     # -----------------------
-    ranking = edited_df.dropna(subset=["vendor_score"]).copy()
-    ranking = ranking.sort_values("vendor_score")
+    ranking = edited_df.dropna(subset=["vendor_score"]).sort_values("vendor_score", kind="mergesort")
 
-    medals = ["🥇", "🥈", "🥉"]
-    ranking["rank"] = [medals[i] if i < 3 else "" for i in range(len(ranking))]
+    ranking = assign_rank_badge(ranking)
 
     st.subheader("🏆 Vendor Ranking")
     st.dataframe(
@@ -167,23 +136,47 @@ if uploaded_file:
     # -----------------------
     # VISUALS
     # -----------------------
+    # Only the charted columns
+    by_vendor = edited_df[["vendor_code", "price", "total_cost"]].set_index("vendor_code")
+
     st.subheader("📉 Price Comparison")
-    st.bar_chart(edited_df.set_index("vendor_code")["price"])
+    st.bar_chart(by_vendor["price"])
 
     st.subheader("💰 Total Cost Comparison")
-    st.bar_chart(edited_df.set_index("vendor_code")["total_cost"])
+    st.bar_chart(by_vendor["total_cost"])
 
     # -----------------------
     # DOWNLOAD UPDATED FILE
     # -----------------------
-    df.update(edited_df)
-
-    st.download_button(
-        "⬇ Download Updated CSV",
-        df.to_csv(index=False),
-        "updated_master_pricing_clean.csv",
-        "text/csv"
-    )
+    # edited_df keeps df's index, so write the edited rows straight back;
+    # untouched rows already match the cached master frame. Copy-on-Write
+    # keeps the write out of the frame shared with other sessions.
+    if edited_rows:
+        # Every editor column is editable, so write back all of them. A
+        # renamed product needs its category added before it can be stored.
+        new_products = edited_df.loc[changed, "product"].dropna().unique()
+        new_products = [p for p in new_products if p not in df["product"].cat.categories]
+        if new_products:
+            df["product"] = df["product"].cat.add_categories(new_products)
+        cols = df.columns
+        df.loc[changed, cols] = edited_df.loc[changed, cols].to_numpy()
+
+    fmt = st.radio("Download format", ["CSV", "Parquet"], horizontal=True)
+
+    if fmt == "Parquet":
+        st.download_button(
+            "⬇ Download Updated Parquet",
+            functools.partial(serialize_parquet, df),
+            "updated_master_pricing_clean.parquet",
+            "application/octet-stream"
+        )
+    else:
+        st.download_button(
+            "⬇ Download Updated CSV",
+            functools.partial(serialize_csv, df),
+            "updated_master_pricing_clean.csv",
+            "text/csv"
+        )
 
 else:
     st.info("Upload your CSV file to begin.")
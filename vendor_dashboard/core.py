@@ -0,0 +1,182 @@
+"""Data cleaning, scoring and loading shared by the dashboard pages."""
+import streamlit as st
+import pandas as pd
+import numpy as np
+import datetime
+import io
+
+# -----------------------------------------------------
+# SAFE CLEANERS
+# -----------------------------------------------------
+def clean_price_col(s):
+    """Strip spaces/$/commas from a price column; blanks and junk become NaN."""
+    s = (
+        s.astype("string")
+        .str.replace("$", "", regex=False)
+        .str.replace(",", "", regex=False)
+        .str.strip()
+    )
+    s = s.mask(s.str.lower().isin(["", "none", "nan"]))
+    return pd.to_numeric(s, errors="coerce").astype("float64")
+
+
+def next_occurrence(month, day, today=None):
+    """Next date (today or later) falling on the given month/day."""
+    today = today or datetime.date.today()
+    due = datetime.date(today.year, month, day)
+    if due < today:
+        due = datetime.date(today.year + 1, month, day)
+    return due
+
+
+def anchor_days(today):
+    """Days from today until the next August 1st and March 15th due dates."""
+    aug_days = (next_occurrence(8, 1, today) - today).days
+    mar_days = (next_occurrence(3, 15, today) - today).days
+    return aug_days, mar_days
+
+
+# Integer tags for the known payment-terms wordings
+TERM_UNKNOWN, TERM_NO_VENDOR, TERM_30, TERM_AUG, TERM_MAR = range(5)
+
+
+def _term_tags(s):
+    """Tag each terms string with one of the TERM_* values."""
+    m_none = s.str.contains("No current vendor", na=False, regex=False).to_numpy(bool)
+    m_30 = s.str.contains("30", na=False, regex=False).to_numpy(bool)
+    m_aug = s.str.contains("August 1st", na=False, regex=False).to_numpy(bool)
+    m_mar = s.str.contains("March 15th", na=False, regex=False).to_numpy(bool)
+
+    # Same precedence as the old per-row checks: "No current vendor", "30", then dates
+    return np.select(
+        [m_none, m_30, m_aug, m_mar],
+        [TERM_NO_VENDOR, TERM_30, TERM_AUG, TERM_MAR],
+        default=TERM_UNKNOWN
+    ).astype(np.int8)
+
+
+def recalc_terms_days_vec(s: pd.Series, aug_days: int, mar_days: int) -> pd.Series:
+    """Map payment terms to days-until-due for a whole column at once.
+
+    Expects terms already stripped; load_and_prepare normalizes the column once.
+    """
+    # terms_raw holds only a handful of distinct wordings: classify those once
+    # and tag rows by code. Missing values get code -1, i.e. the trailing
+    # TERM_UNKNOWN.
+    codes, uniques = pd.factorize(s)
+    unique_tags = _term_tags(pd.Series(uniques, dtype="string"))
+    tags = np.append(unique_tags, np.int8(TERM_UNKNOWN))[codes]
+
+    # Indexed by TERM_* value
+    days_by_tag = np.array([np.nan, np.nan, 30, aug_days, mar_days], dtype=np.float64)
+    return pd.Series(days_by_tag[tags], index=s.index, dtype="float64")
+
+
+def score_df(df):
+    """Vendor score = price + 1/terms_days; NaN when price or days are missing/zero."""
+    days = pd.to_numeric(df["terms_days"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    price = pd.to_numeric(df["price"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    valid = days > 0
+    score = np.where(valid, price + 1.0 / np.where(valid, days, 1.0), np.nan)
+    return pd.Series(score, index=df.index).round(4)
+
+
+# -----------------------------------------------------
+# RANKING
+# -----------------------------------------------------
+def assign_rank_badge(ranking):
+    """Set a medal "rank" column on a frame already sorted best-first."""
+    medals = np.array(["🥇", "🥈", "🥉"], dtype=object)
+    n_medals = min(len(medals), len(ranking))
+    ranks = np.full(len(ranking), "", dtype=object)
+    ranks[:n_medals] = medals[:n_medals]
+    ranking["rank"] = ranks
+    return ranking
+
+
+# -----------------------------------------------------
+# DATA LOADING (cached across reruns)
+# -----------------------------------------------------
+@st.cache_resource(show_spinner="Loading vendor pricing data...", max_entries=8)
+def load_and_prepare(file_key: str, _file_bytes: bytes, aug_days: int, mar_days: int) -> pd.DataFrame:
+    """Parse the uploaded CSV and add cleaned price, terms_days and vendor_score.
+
+    Cached on the file's content digest (``_file_bytes`` is not hashed by
+    Streamlit) plus the anchor days, so cached terms roll over daily.
+
+    The frame is a shared resource, one object for every session. Use
+    get_master_frame rather than calling this directly.
+    """
+    # Keep every column in the file's own order so the downloaded master file
+    # has the same layout; the columns the app uses are typed up front.
+    # product is only a filter key, so it is a category and filters compare
+    # integer codes. vendor_code and terms_raw stay plain strings so the
+    # editor lets users type new values instead of picking from a dropdown.
+    # The pyarrow engine parses multithreaded; without dtype_backend="pyarrow"
+    # the other columns come back as regular pandas dtypes for st.data_editor.
+    df = pd.read_csv(
+        io.BytesIO(_file_bytes),
+        engine="pyarrow",
+        dtype={
+            "product": "category",
+            "vendor_code": "string",
+            "terms_raw": "string",
+            "price": "string",
+        }
+    )
+
+    # CLEAN PRICE FIRST
+    df["price"] = clean_price_col(df["price"])
+
+    # CLEAN TERMS (normalize the wording once)
+    df["terms_raw"] = df["terms_raw"].str.strip()
+    df["terms_days"] = recalc_terms_days_vec(df["terms_raw"], aug_days, mar_days)
+
+    # SCORE
+    df["vendor_score"] = score_df(df)
+
+    return df
+
+
+def get_master_frame(file_key: str, file_bytes: bytes, aug_days: int, mar_days: int) -> pd.DataFrame:
+    """This session's view of the shared frame from load_and_prepare.
+
+    A shallow copy costs no data copy. Under pandas Copy-on-Write (always on
+    since pandas 3.0) any write to it, whether a column assignment or an
+    in-place .loc update, first copies the data it touches. So no session can
+    change the cached frame other sessions see.
+    """
+    return load_and_prepare(file_key, file_bytes, aug_days, mar_days).copy(deep=False)
+
+
+def serialize_csv(df: pd.DataFrame) -> bytes:
+    """CSV bytes for the download button.
+
+    Passed to st.download_button as a callable, so it only runs on click.
+    """
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, lineterminator="\n")
+    return buf.getvalue()
+
+
+def serialize_parquet(df: pd.DataFrame) -> bytes:
+    """Zstd-compressed Parquet bytes; generated on click like serialize_csv."""
+    buf = io.BytesIO()
+    df.to_parquet(buf, engine="pyarrow", compression="zstd", index=False)
+    return buf.getvalue()
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def product_rows(key, _df: pd.DataFrame) -> dict:
+    """Map each product to the positional row numbers of its vendors.
+
+    Built once per ``key`` (which must identify ``_df``), so picking a product
+    is a dict lookup plus an iloc gather instead of a full-column compare.
+    """
+    return _df.groupby("product", observed=True).indices
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def product_options(key, _df: pd.DataFrame) -> list:
+    """Sorted product names for the selectbox, read from the category index."""
+    return _df["product"].cat.categories.sort_values().tolist()